@@ -3,73 +3,113 @@
 
 Uses EbookLib to extract the textual content of an EPUB file and prints the JSON
 structure expected by the Rust `ImportResponse` type. HTML is converted to plain
-text using a simple HTML parser to avoid external dependencies.
+text with lxml's HTML parser, which EbookLib already depends on. Sections are
+written to stdout one at a time as each document is converted.
 """
 
 from __future__ import annotations
 
+import io
 import json
 import sys
-from html import unescape
-from html.parser import HTMLParser
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 
 try:
+    import ebooklib
     from ebooklib import epub
+    from lxml import etree
 except ImportError:  # pragma: no cover - handled at runtime
     sys.stderr.write("EbookLib is required to import EPUB files.\n")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:  # optional: faster encoder, stdlib json is the fallback
+    orjson = None
+
+
+BLOCK_TAGS = frozenset(
+    {
+        "p",
+        "div",
+        "section",
+        "article",
+        "h1",
+        "h2",
+        "h3",
+        "h4",
+        "h5",
+        "h6",
+        "li",
+        "ol",
+        "ul",
+        "blockquote",
+        "br",
+    }
+)
+
+# Text emitted at both edges of an element; everything else maps to nothing.
+TAG_BREAKS = dict.fromkeys(BLOCK_TAGS, "\n")
+
+# Subtrees that are never read aloud: code, styling, footnote markers and the
+# document <title>, which is reported as the section heading instead.
+SKIP_TAGS = frozenset({"script", "style", "sup", "title"})
+
+HTML_PARSER = etree.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+
+
+@lru_cache(maxsize=4096)
+def clean_line(line: str) -> str:
+    # Books repeat the same short lines (running headers, copyright, "* * *").
+    # str.split() collapses whitespace runs in C without the regex engine.
+    return " ".join(line.split())
+
+
+def html_to_text(content: bytes) -> Tuple[Optional[str], str]:
+    if not content.strip():
+        return None, ""
+    root = etree.fromstring(content, HTML_PARSER)
+    if root is None:
+        return None, ""
+
+    # One pass: skipped subtrees are stepped over with a depth counter rather
+    # than removed from the tree first, and <title> is picked up on the way.
+    title: Optional[str] = None
+    skip_depth = 0
+    buffer = io.StringIO()
+    write = buffer.write
+    tag_break = TAG_BREAKS.get
+    for event, element in etree.iterwalk(root, events=("start", "end")):
+        if skip_depth:
+            skip_depth += 1 if event == "start" else -1
+            if not skip_depth and element.tail:
+                write(element.tail)
+            continue
+        if element.tag in SKIP_TAGS:
+            skip_depth = 1
+            if element.tag == "title" and title is None:
+                title = clean_line(element.text or "") or None
+            continue
+
+        separator = tag_break(element.tag)
+        if separator:
+            write(separator)
+        if event == "start":
+            if element.text:
+                write(element.text)
+        elif element.tail and element is not root:
+            write(element.tail)
+
+    lines = (clean_line(line) for line in buffer.getvalue().splitlines())
+    return title, "\n".join(line for line in lines if line)
 
-BLOCK_TAGS = {
-    "p",
-    "div",
-    "section",
-    "article",
-    "h1",
-    "h2",
-    "h3",
-    "h4",
-    "h5",
-    "h6",
-    "li",
-    "ol",
-    "ul",
-    "blockquote",
-    "br",
-}
-
-
-class TextExtractor(HTMLParser):
-    def __init__(self) -> None:
-        super().__init__()
-        self.parts: List[str] = []
-
-    def handle_starttag(self, tag: str, attrs: List[tuple[str, str]]) -> None:
-        if tag in BLOCK_TAGS:
-            self.parts.append("\n")
-
-    def handle_endtag(self, tag: str) -> None:
-        if tag in BLOCK_TAGS:
-            self.parts.append("\n")
-
-    def handle_data(self, data: str) -> None:
-        if data:
-            self.parts.append(unescape(data))
-
-    def get_text(self) -> str:
-        text = "".join(self.parts)
-        lines = [line.strip() for line in text.splitlines()]
-        filtered = [line for line in lines if line]
-        return "\n".join(filtered)
-
-
-def html_to_text(content: bytes) -> str:
-    parser = TextExtractor()
-    parser.feed(content.decode("utf-8", errors="ignore"))
-    parser.close()
-    return parser.get_text()
+
+def encode(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
 
 
 def normalise_metadata(book: "epub.EpubBook") -> Dict[str, Any]:
@@ -89,6 +129,34 @@ def first_metadata(values: Iterable[str]) -> Optional[str]:
     return None
 
 
+def iter_documents(book: "epub.EpubBook") -> Iterator["epub.EpubItem"]:
+    # Follow the spine so documents come in reading order and manifest-only
+    # pages (covers, navigation, orphans) are never parsed. The manifest is
+    # indexed once because get_item_with_id() is a linear scan.
+    if not book.spine:
+        yield from book.get_items_of_type(ebooklib.ITEM_DOCUMENT)
+        return
+    items = {item.get_id(): item for item in book.get_items()}
+    for item_id, _linear in book.spine:
+        item = items.get(item_id)
+        if item is not None and item.get_type() == ebooklib.ITEM_DOCUMENT:
+            yield item
+
+
+def iter_sections(book: "epub.EpubBook") -> Iterator[Dict[str, Any]]:
+    for item in iter_documents(book):
+        # get_content() would re-parse and re-serialise the document (dropping
+        # its <head>); the raw bytes go straight to our own parser instead.
+        title, text = html_to_text(item.content)
+        if not text:
+            continue
+        yield {
+            "id": item.get_name(),
+            "heading": getattr(item, "title", None) or title,
+            "content": text,
+        }
+
+
 def main(argv: List[str]) -> int:
     if len(argv) != 2:
         sys.stderr.write("Usage: import_epub.py <path-to-epub>\n")
@@ -100,41 +168,34 @@ def main(argv: List[str]) -> int:
         return 1
 
     try:
-        book = epub.read_epub(path)
+        book = epub.read_epub(path, {"ignore_ncx": True})
     except Exception as exc:  # pragma: no cover - depends on ebooklib internals
         sys.stderr.write(f"Unable to open EPUB: {exc}\n")
         return 1
 
-    sections: List[Dict[str, Any]] = []
-    for item in book.get_items_of_type(epub.ITEM_DOCUMENT):
-        text = html_to_text(item.get_content())
-        if not text:
-            continue
-        sections.append(
-            {
-                "id": item.get_name(),
-                "heading": getattr(item, "title", None),
-                "content": text,
-            }
-        )
-
-    warnings: List[str] = []
-    if not sections:
-        warnings.append("No se encontró texto en el EPUB")
-
     title = first_metadata(value for value, _ in book.get_metadata("DC", "title"))
     language = first_metadata(value for value, _ in book.get_metadata("DC", "language"))
 
-    payload: Dict[str, Any] = {
-        "title": title,
-        "language": language,
-        "sections": sections,
-        "metadata": normalise_metadata(book),
-        "warnings": warnings,
-    }
+    # Stream the payload: the header fields first, then each section as soon
+    # as its document is converted. Key order does not matter to the Rust side.
+    out = sys.stdout.buffer
+    out.write(b'{"title": ' + encode(title))
+    out.write(b', "language": ' + encode(language))
+    out.write(b', "metadata": ' + encode(normalise_metadata(book)))
+    out.write(b', "sections": [')
+    written = 0
+    for section in iter_sections(book):
+        if written:
+            out.write(b", ")
+        out.write(encode(section))
+        written += 1
+
+    warnings: List[str] = []
+    if not written:
+        warnings.append("No se encontró texto en el EPUB")
 
-    json.dump(payload, sys.stdout, ensure_ascii=False)
-    sys.stdout.write("\n")
+    out.write(b'], "warnings": ' + encode(warnings) + b"}\n")
+    out.flush()
     return 0
 
 
@@ -2,16 +2,25 @@
 """PDF importer for Reader.
 
 Reads a PDF file using PyMuPDF (fitz) and emits the JSON structure expected by the
-Rust `ImportResponse` type. Each page is converted into a section with its text
-content. Basic document metadata is preserved when available.
+Rust `ImportResponse` type. Each page is converted into a section whose
+paragraphs are MuPDF's text blocks, with line-break hyphenation undone and
+whitespace normalised. Large documents are extracted in page batches by worker
+processes. Basic document metadata is preserved when available. Sections are
+written to stdout as they are extracted so memory use does not grow with the
+page count.
 """
 
 from __future__ import annotations
 
 import json
+import os
+import re
 import sys
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 try:
     import fitz  # PyMuPDF
@@ -19,9 +28,89 @@ except ImportError:  # pragma: no cover - handled at runtime
     sys.stderr.write("PyMuPDF (fitz) is required to import PDFs.\n")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:  # optional: faster encoder, stdlib json is the fallback
+    orjson = None
+
+
+# Each worker process must be worth its start-up cost (spawn on Windows).
+PARALLEL_MIN_PAGES = 64
+# Pages per task; small enough that uneven pages balance out across workers.
+PARALLEL_BATCH_PAGES = 16
+
+# Open documents per process, keyed by (path, mtime_ns), least recent first.
+DOCUMENT_CACHE_SIZE = 4
+_DOCUMENTS: "OrderedDict[Tuple[str, int], fitz.Document]" = OrderedDict()
+
+# Single-character PDF artefacts, fixed in one str.translate pass: stray CRs
+# and form feeds become line breaks, non-breaking spaces plain spaces.
+NORMALISE = str.maketrans({"\r": "\n", "\f": "\n", "\u00a0": " ", "\u202f": " "})
+
+# A hyphen at the end of a line joins the word; any other whitespace run
+# becomes a single space. One regex so each block is scanned once.
+CLEAN_RE = re.compile(r"-\n|[ \t\r\n\f\v]+")
+
+
+def _clean_match(match: "re.Match[str]") -> str:
+    return "" if match.group()[0] == "-" else " "
+
+
+def clean_text(raw: str) -> str:
+    text = raw.replace("\r\n", "\n").translate(NORMALISE)
+    return CLEAN_RE.sub(_clean_match, text).strip()
+
+
+def blocks_to_text(blocks: Iterable[Sequence[Any]]) -> str:
+    # get_text("blocks") yields (x0, y0, x1, y1, text, block_no, block_type);
+    # MuPDF has already grouped lines into paragraphs, type 1 is an image.
+    paragraphs = (clean_text(block[4]) for block in blocks if block[6] == 0)
+    return "\n\n".join(paragraph for paragraph in paragraphs if paragraph)
+
+
+def read_pages(document: "fitz.Document", start: int, stop: int) -> Iterator[str]:
+    # Index loop with get_page_text: each Page is released as soon as its
+    # text is out instead of being held by the document iterator.
+    for index in range(start, stop):
+        yield blocks_to_text(document.get_page_text(index, "blocks"))
+
+
+def open_cached(path: str) -> "fitz.Document":
+    key = (path, os.stat(path).st_mtime_ns)
+    document = _DOCUMENTS.get(key)
+    if document is not None:
+        _DOCUMENTS.move_to_end(key)
+        return document
+    document = fitz.open(path)
+    _DOCUMENTS[key] = document
+    if len(_DOCUMENTS) > DOCUMENT_CACHE_SIZE:
+        _DOCUMENTS.popitem(last=False)[1].close()
+    return document
+
 
-def page_to_section(page: "fitz.Page", index: int) -> Optional[Dict[str, Any]]:
-    text = page.get_text("text").strip()
+def extract_pages(path: str, start: int, stop: int) -> List[str]:
+    # Runs in a worker process; MuPDF documents cannot be shared between
+    # threads or processes, so each worker opens its own handle and keeps it
+    # for the following batches instead of re-reading the xref every time.
+    return list(read_pages(open_cached(path), start, stop))
+
+
+def iter_page_texts(document: "fitz.Document", path: Path) -> Iterator[str]:
+    page_count = document.page_count
+    workers = min(os.cpu_count() or 1, page_count // PARALLEL_MIN_PAGES)
+    if workers < 2:
+        yield from read_pages(document, 0, page_count)
+        return
+
+    starts = range(0, page_count, PARALLEL_BATCH_PAGES)
+    stops = [min(start + PARALLEL_BATCH_PAGES, page_count) for start in starts]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        batches = executor.map(extract_pages, repeat(str(path)), starts, stops)
+        for batch in batches:
+            yield from batch
+
+
+def page_to_section(text: str, index: int) -> Optional[Dict[str, Any]]:
     if not text:
         return None
     return {
@@ -31,6 +120,12 @@ def page_to_section(page: "fitz.Page", index: int) -> Optional[Dict[str, Any]]:
     }
 
 
+def encode(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False).encode("utf-8")
+
+
 def normalise_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
     result: Dict[str, Any] = {}
     for key, value in metadata.items():
@@ -50,35 +145,38 @@ def main(argv: List[str]) -> int:
         return 1
 
     try:
-        document = fitz.open(path)
+        # One sequential read instead of MuPDF's many small seeks and reads.
+        document = fitz.open(stream=path.read_bytes(), filetype="pdf")
     except Exception as exc:  # pragma: no cover - depends on fitz internals
         sys.stderr.write(f"Unable to open PDF: {exc}\n")
         return 1
 
-    sections: List[Dict[str, Any]] = []
-    for index, page in enumerate(document):
-        section = page_to_section(page, index)
-        if section:
-            sections.append(section)
-
-    warnings: List[str] = []
-    if not sections:
-        warnings.append("No se encontró texto en el PDF")
-
     metadata = normalise_metadata(document.metadata or {})
     title = metadata.get("title")
     language = metadata.get("language") or metadata.get("lang")
 
-    payload: Dict[str, Any] = {
-        "title": title if title else None,
-        "language": language if language else None,
-        "sections": sections,
-        "metadata": metadata,
-        "warnings": warnings,
-    }
+    # Stream the payload: the header fields first, then each section as soon
+    # as its page is extracted. Key order does not matter to the Rust side.
+    out = sys.stdout.buffer
+    out.write(b'{"title": ' + encode(title if title else None))
+    out.write(b', "language": ' + encode(language if language else None))
+    out.write(b', "metadata": ' + encode(metadata))
+    out.write(b', "sections": [')
+    written = 0
+    for index, text in enumerate(iter_page_texts(document, path)):
+        section = page_to_section(text, index)
+        if section:
+            if written:
+                out.write(b", ")
+            out.write(encode(section))
+            written += 1
+
+    warnings: List[str] = []
+    if not written:
+        warnings.append("No se encontró texto en el PDF")
 
-    json.dump(payload, sys.stdout, ensure_ascii=False)
-    sys.stdout.write("\n")
+    out.write(b'], "warnings": ' + encode(warnings) + b"}\n")
+    out.flush()
     return 0
 
 
@@ -130,8 +130,9 @@ pub(crate) fn run_importer(
         ));
     }
 
-    let stdout = String::from_utf8_lossy(&output.stdout).to_string();
-    let raw: RawImport = serde_json::from_str(&stdout).map_err(|err| {
+    // The importers write UTF-8 JSON bytes straight to stdout; parse them in
+    // place instead of copying the (possibly multi-megabyte) buffer to a String.
+    let raw: RawImport = serde_json::from_slice(&output.stdout).map_err(|err| {
         CommandError::new(
             ERROR_INVALID_JSON,
             "Importer returned invalid JSON",
@@ -304,6 +305,34 @@ print(json.dumps({
         assert_eq!(error.code, ERROR_INVALID_JSON);
     }
 
+    #[test]
+    fn raw_utf8_output_is_parsed() {
+        let temp = TempDir::new().unwrap();
+        let _guard = write_mock_importer(
+            &temp,
+            r#"import sys
+sys.stdout.buffer.write('{"sections": [{"content": "Año"}]}\n'.encode("utf-8"))
+"#,
+        );
+        let request = sample_request(&temp);
+        let response = import_pdf(request).unwrap();
+        assert_eq!(response.document.sections[0].content, "Año");
+    }
+
+    #[test]
+    fn invalid_utf8_returns_invalid_json() {
+        let temp = TempDir::new().unwrap();
+        let _guard = write_mock_importer(
+            &temp,
+            r#"import sys
+sys.stdout.buffer.write(b'{"sections": [{"content": "\xff"}]}')
+"#,
+        );
+        let request = sample_request(&temp);
+        let error = import_pdf(request).unwrap_err();
+        assert_eq!(error.code, ERROR_INVALID_JSON);
+    }
+
     #[test]
     fn missing_content_is_invalid_response() {
         let temp = TempDir::new().unwrap();